@@ -7,11 +7,12 @@ Provides endpoints for:
 - API key regeneration
 """
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session
 
 from app.core.database import engine
-from app.core.auth import create_access_token, get_current_user
-from app.models.user import User, UserLogin, UserResponse
+from app.core.auth import create_access_token, get_current_user, invalidate_api_key
+from app.models.user import User, UserLogin, UserResponse, hash_password
 
 router = APIRouter()
 
@@ -24,12 +25,23 @@ async def login(credentials: UserLogin):
     from app.core.auth import get_user_by_username
     
     user = get_user_by_username(credentials.username)
-    if not user or not user.verify_password(credentials.password):
+    # PBKDF2 is CPU-bound; keep it off the event loop
+    if not user or not await run_in_threadpool(user.verify_password, credentials.password):
         raise HTTPException(
             status_code=401,
             detail="Incorrect username or password"
         )
     
+    # Upgrade legacy SHA-256 hashes to PBKDF2 now that we have the plaintext
+    if not user.hashed_password.startswith("pbkdf2_sha256$"):
+        new_hash = await run_in_threadpool(hash_password, credentials.password)
+        with Session(engine) as session:
+            db_user = session.get(User, user.id)
+            if db_user:
+                db_user.hashed_password = new_hash
+                session.add(db_user)
+                session.commit()
+    
     access_token = create_access_token(data={"sub": user.username})
     
     return {
@@ -68,10 +80,15 @@ async def regenerate_api_key(current_user: User = Depends(get_current_user)):
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
+        old_key = user.api_key
         new_key = user.regenerate_api_key()
         session.add(user)
         session.commit()
         
+        # Old key must stop working immediately for the proxy middleware
+        invalidate_api_key(old_key)
+        invalidate_api_key(new_key)
+        
         return {
             "api_key": new_key,
             "message": "API key regenerated successfully"
@@ -90,17 +107,15 @@ async def change_password(data: PasswordChange, current_user: User = Depends(get
     """
     Change user password.
     """
-    from app.models.user import hash_password
-    
     with Session(engine) as session:
         user = session.get(User, current_user.id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
             
-        if not user.verify_password(data.current_password):
+        if not await run_in_threadpool(user.verify_password, data.current_password):
             raise HTTPException(status_code=400, detail="Incorrect current password")
             
-        user.hashed_password = hash_password(data.new_password)
+        user.hashed_password = await run_in_threadpool(hash_password, data.new_password)
         session.add(user)
         session.commit()
         
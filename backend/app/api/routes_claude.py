@@ -9,6 +9,7 @@ from fastapi.responses import StreamingResponse, JSONResponse
 import json
 import time
 import httpx
+import orjson
 
 from app.core.token_manager import get_token_manager
 from app.core.usage_logger import log_usage
@@ -154,11 +155,11 @@ async def _handle_streaming(gemini_payload: dict, access_token: str, model: str)
         
         try:
             async for chunk in stream_gemini_api(gemini_payload, access_token):
-                if chunk.startswith("data:"):
+                if chunk.startswith(b"data:"):
                     data_str = chunk[5:].strip()
-                    if data_str and data_str != "[DONE]":
+                    if data_str and data_str != b"[DONE]":
                         try:
-                            gemini_data = json.loads(data_str)
+                            gemini_data = orjson.loads(data_str)
                             delta_text = _extract_text_delta(gemini_data)
                             if delta_text:
                                 delta_event = {
@@ -167,7 +168,7 @@ async def _handle_streaming(gemini_payload: dict, access_token: str, model: str)
                                     "delta": {"type": "text_delta", "text": delta_text}
                                 }
                                 yield f"event: content_block_delta\ndata: {json.dumps(delta_event)}\n\n"
-                        except json.JSONDecodeError:
+                        except orjson.JSONDecodeError:
                             pass
             
             yield f"event: content_block_stop\ndata: {json.dumps({'type': 'content_block_stop', 'index': 0})}\n\n"
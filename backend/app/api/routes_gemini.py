@@ -182,19 +182,13 @@ async def generate_content(
             if is_stream:
                 async def generate_stream():
                     try:
+                        # stream_gemini_api already unwraps the v1internal
+                        # wrapper, so events can be forwarded as-is.
                         async for chunk in stream_gemini_api(gemini_payload, access_token):
-                            if chunk.startswith("data:"):
+                            if chunk.startswith(b"data:"):
                                 data_str = chunk[5:].strip()
-                                if data_str and data_str != "[DONE]":
-                                    try:
-                                        gemini_data = json.loads(data_str)
-                                        if "response" in gemini_data:
-                                            inner = gemini_data["response"]
-                                            yield f"data: {json.dumps(inner)}\n\n"
-                                        else:
-                                            yield f"data: {data_str}\n\n"
-                                    except json.JSONDecodeError:
-                                        yield f"data: {data_str}\n\n"
+                                if data_str and data_str != b"[DONE]":
+                                    yield chunk
                         yield "data: [DONE]\n\n"
                     except Exception as e:
                         error_chunk = {"error": {"message": str(e)}}
@@ -1,14 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 from app.core.database import get_session
 from app.models.account import Account, AccountCreate, AccountRead, Token, Quota
 
 router = APIRouter()
 
+# Built once; validates/serializes the whole list in pydantic-core
+ACCOUNT_READ_LIST = TypeAdapter(list[AccountRead])
+
 @router.get("/", response_model=list[AccountRead])
 def list_accounts(session: Session = Depends(get_session)):
-    accounts = session.exec(select(Account)).all()
-    return accounts
+    accounts = session.exec(
+        select(Account).options(selectinload(Account.token), selectinload(Account.quota))
+    ).all()
+    # Validate from the ORM rows and dump to JSON in one pass (response_model stays for the OpenAPI schema)
+    result = ACCOUNT_READ_LIST.validate_python(accounts, from_attributes=True)
+    return Response(content=ACCOUNT_READ_LIST.dump_json(result), media_type="application/json")
 
 @router.post("/", response_model=AccountRead)
 def create_account(account: AccountCreate, session: Session = Depends(get_session)):
@@ -5,10 +5,11 @@ Exposes OpenAI-compatible endpoints that proxy to Google Gemini.
 Uses TokenManager for account rotation and 429 retry.
 """
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse, ORJSONResponse
 import json
 import time
 import httpx
+import orjson
 
 from app.core.token_manager import get_token_manager
 from app.core.usage_logger import log_usage
@@ -158,14 +159,14 @@ async def _handle_streaming(gemini_payload: dict, access_token: str, model: str,
     async def generate_stream():
         try:
             async for chunk in stream_gemini_api(gemini_payload, access_token):
-                if chunk.startswith("data:"):
+                if chunk.startswith(b"data:"):
                     data_str = chunk[5:].strip()
-                    if data_str and data_str != "[DONE]":
+                    if data_str and data_str != b"[DONE]":
                         try:
-                            gemini_data = json.loads(data_str)
+                            gemini_data = orjson.loads(data_str)
                             openai_chunk = _convert_stream_chunk(gemini_data, model)
-                            yield f"data: {json.dumps(openai_chunk)}\n\n"
-                        except json.JSONDecodeError:
+                            yield b"data: " + orjson.dumps(openai_chunk) + b"\n\n"
+                        except orjson.JSONDecodeError:
                             pass
             yield "data: [DONE]\n\n"
         except Exception as e:
@@ -183,7 +184,7 @@ async def _handle_non_streaming(gemini_payload: dict, access_token: str, model:
     """Handle non-streaming response."""
     gemini_response = await call_gemini_api(gemini_payload, access_token, stream=False)
     openai_response = transform_gemini_to_openai(gemini_response, model)
-    return JSONResponse(content=openai_response.model_dump())
+    return ORJSONResponse(content=openai_response)
 
 
 def _convert_stream_chunk(gemini_data: dict, model: str) -> dict:
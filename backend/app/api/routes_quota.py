@@ -176,7 +176,7 @@ async def get_quota_matrix() -> List[Dict[str, Any]]:
     for token in tokens:
         account_status = {
             "email": token.email,
-            "project_id": token.project_id,
+            "project_id": token.effective_project_id,
             "quotas": {}
         }
         
@@ -193,7 +193,7 @@ async def get_quota_matrix() -> List[Dict[str, Any]]:
         
         try:
             async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(url, json={"project": token.project_id}, headers=headers)
+                response = await client.post(url, json={"project": token.effective_project_id}, headers=headers)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -9,7 +9,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any
 
 from app.core.database import get_session
-from app.models.usage import UsageLog
+from app.models.usage import UsageLog, to_timestamp_ms
 from app.core.token_manager import get_token_manager
 
 router = APIRouter(prefix="/stats", tags=["Stats"])
@@ -34,7 +34,7 @@ async def get_overview(session: Session = Depends(get_session)) -> Dict[str, Any
     # Today's requests
     today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
     today_count = session.exec(
-        select(func.count(UsageLog.id)).where(UsageLog.timestamp >= today)
+        select(func.count(UsageLog.id)).where(UsageLog.timestamp_ms >= to_timestamp_ms(today))
     ).one()
     
     return {
@@ -114,8 +114,8 @@ async def get_daily_stats(session: Session = Depends(get_session)) -> List[Dict[
         
         count = session.exec(
             select(func.count(UsageLog.id))
-            .where(UsageLog.timestamp >= day)
-            .where(UsageLog.timestamp < next_day)
+            .where(UsageLog.timestamp_ms >= to_timestamp_ms(day))
+            .where(UsageLog.timestamp_ms < to_timestamp_ms(next_day))
         ).one()
         
         days.append({
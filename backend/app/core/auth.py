@@ -4,8 +4,9 @@ Authentication Utilities
 JWT token creation/validation and FastAPI dependencies.
 """
 import os
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
@@ -22,6 +23,11 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 # Security scheme
 security = HTTPBearer(auto_error=False)
 
+# API key lookup cache: api_key -> (user or None, cached_at monotonic time)
+API_KEY_CACHE_TTL = 60  # seconds
+API_KEY_CACHE_MAX_SIZE = 10000
+_api_key_cache: Dict[str, Tuple[Optional[User], float]] = {}
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
@@ -57,6 +63,31 @@ def get_user_by_api_key(api_key: str) -> Optional[User]:
         return session.exec(statement).first()
 
 
+def get_cached_user_by_api_key(api_key: str) -> Optional[User]:
+    """
+    Get user by API key, cached for API_KEY_CACHE_TTL seconds.
+    
+    Misses are cached too, so a burst of requests with an invalid key
+    doesn't hit the database on every request.
+    """
+    now = time.monotonic()
+    cached = _api_key_cache.get(api_key)
+    if cached is not None and now - cached[1] < API_KEY_CACHE_TTL:
+        return cached[0]
+    
+    user = get_user_by_api_key(api_key)
+    if len(_api_key_cache) >= API_KEY_CACHE_MAX_SIZE:
+        # Bound memory under invalid-key floods
+        _api_key_cache.clear()
+    _api_key_cache[api_key] = (user, now)
+    return user
+
+
+def invalidate_api_key(api_key: str):
+    """Drop an API key from the cache (call when keys are rotated or revoked)."""
+    _api_key_cache.pop(api_key, None)
+
+
 async def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
 ) -> User:
@@ -1,5 +1,7 @@
+from sqlalchemy import inspect
 from sqlmodel import SQLModel, create_engine, Session, select
 from app.models import account # Ensure models are imported for table creation
+from app.models.account import Token
 from app.models.user import User
 from app.models.mapping import ModelMapping
 from app.models.usage import UsageLog  # For usage statistics table
@@ -10,12 +12,65 @@ sqlite_file_name = os.environ.get("AG_DB_PATH", "antigravity.db")
 sqlite_url = f"sqlite:///{sqlite_file_name}"
 
 connect_args = {"check_same_thread": False}
-engine = create_engine(sqlite_url, connect_args=connect_args)
+engine = create_engine(sqlite_url, connect_args=connect_args, insertmanyvalues_page_size=1000)
 
 def create_db_and_tables():
+    migrate_usage_log_timestamp()
+    migrate_quota_models_json()
     SQLModel.metadata.create_all(engine)
+    # create_all skips indexes on tables that already exist; add any new ones
+    for index in (*UsageLog.__table__.indexes, *Token.__table__.indexes):
+        index.create(engine, checkfirst=True)
     seed_default_user()
 
+def migrate_usage_log_timestamp():
+    """Convert a usagelog table with a datetime `timestamp` column to integer `timestamp_ms`."""
+    inspector = inspect(engine)
+    if not inspector.has_table("usagelog"):
+        return
+    columns = {c["name"] for c in inspector.get_columns("usagelog")}
+    if "timestamp_ms" in columns or "timestamp" not in columns:
+        return
+    
+    # SQLite can't alter the column in place: rebuild the table and copy rows over
+    with engine.begin() as conn:
+        # Index names are global in SQLite, drop the old ones before recreating
+        for index in inspector.get_indexes("usagelog"):
+            name = index["name"]
+            conn.exec_driver_sql(f'DROP INDEX IF EXISTS "{name}"')
+        conn.exec_driver_sql("ALTER TABLE usagelog RENAME TO usagelog_old")
+        UsageLog.__table__.create(conn)
+        conn.exec_driver_sql(
+            "INSERT INTO usagelog (id, timestamp_ms, protocol, model, account_email, success, "
+            "status_code, response_time_ms, error_type) "
+            "SELECT id, CAST(ROUND((julianday(timestamp) - 2440587.5) * 86400000) AS INTEGER), "
+            "protocol, model, account_email, success, status_code, response_time_ms, error_type "
+            "FROM usagelog_old"
+        )
+        conn.exec_driver_sql("DROP TABLE usagelog_old")
+    print("[Database] Migrated usagelog.timestamp to timestamp_ms")
+
+def migrate_quota_models_json():
+    """Fold the old modelquota table into the quota.models_json column."""
+    inspector = inspect(engine)
+    if not inspector.has_table("quota"):
+        return
+    columns = {c["name"] for c in inspector.get_columns("quota")}
+    if "models_json" in columns:
+        return
+    
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE quota ADD COLUMN models_json JSON")
+        if inspector.has_table("modelquota"):
+            conn.exec_driver_sql(
+                "UPDATE quota SET models_json = ("
+                "SELECT json_group_array(json_object('name', name, 'percentage', percentage, 'reset_time', reset_time)) "
+                "FROM modelquota WHERE modelquota.quota_id = quota.id) "
+                "WHERE EXISTS (SELECT 1 FROM modelquota WHERE modelquota.quota_id = quota.id)"
+            )
+            conn.exec_driver_sql("DROP TABLE modelquota")
+    print("[Database] Migrated modelquota rows into quota.models_json")
+
 def seed_default_user():
     """Create the default admin user if not exists."""
     with Session(engine) as session:
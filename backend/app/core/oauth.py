@@ -17,6 +17,9 @@ TOKEN_URL = "https://oauth2.googleapis.com/token"
 USERINFO_URL = "https://www.googleapis.com/oauth2/v2/userinfo"
 AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
 
+# Fallback Cloud Code project (works for most users)
+DEFAULT_PROJECT_ID = "bamboo-precept-lgxtn"
+
 # Required scopes for Gemini API access
 SCOPES = [
     "https://www.googleapis.com/auth/cloud-platform",
@@ -215,7 +218,7 @@ async def fetch_account_info(access_token: str) -> Tuple[Optional[str], Optional
         print(f"Failed to fetch account info: {e}")
     
     # Fallback to default project (works for most users)
-    return ("bamboo-precept-lgxtn", None)
+    return (DEFAULT_PROJECT_ID, None)
 
 
 # Keep old function name for backwards compatibility
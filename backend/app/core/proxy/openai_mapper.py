@@ -5,7 +5,9 @@ This module transforms OpenAI API request format into Google Gemini API format.
 This is the core of the reverse proxy functionality.
 """
 import uuid
+from collections import deque
 from typing import Any, Dict, List, Optional
+from orjson import loads as _json_loads, JSONDecodeError as _JSONDecodeError
 from .openai_models import OpenAIRequest, OpenAIMessage
 
 def transform_openai_to_gemini(request: OpenAIRequest, project_id: str, mapped_model: str) -> Dict[str, Any]:
@@ -47,31 +49,22 @@ def transform_openai_to_gemini(request: OpenAIRequest, project_id: str, mapped_m
                 if msg.content:
                     parts.append({"text": msg.content})
             elif isinstance(msg.content, list):
+                # Block count is known up front: pre-size, fill in place, trim unused slots
+                parts = [None] * len(msg.content)
+                idx = 0
                 for block in msg.content:
-                    if isinstance(block, dict):
-                        if block.get("type") == "text":
-                            parts.append({"text": block.get("text", "")})
-                        elif block.get("type") == "image_url":
-                            image_url_data = block.get("image_url", {})
-                            url = image_url_data.get("url", "")
-                            if url.startswith("data:"):
-                                # Base64 encoded image
-                                try:
-                                    meta, data = url.split(",", 1)
-                                    mime_type = meta.split(":")[1].split(";")[0]
-                                    parts.append({"inlineData": {"mimeType": mime_type, "data": data}})
-                                except (ValueError, IndexError):
-                                    pass # Skip malformed data URLs
-                            elif url.startswith("http"):
-                                parts.append({"fileData": {"fileUri": url, "mimeType": "image/jpeg"}})
+                    part = _content_block_to_part(block)
+                    if part is not None:
+                        parts[idx] = part
+                        idx += 1
+                del parts[idx:]
         
         # Handle tool calls (from assistant)
         if msg.tool_calls:
             for tc in msg.tool_calls:
-                import json
                 try:
-                    args = json.loads(tc.function.arguments)
-                except json.JSONDecodeError:
+                    args = _json_loads(tc.function.arguments)
+                except _JSONDecodeError:
                     args = {}
                 parts.append({
                     "functionCall": {
@@ -128,7 +121,11 @@ def transform_openai_to_gemini(request: OpenAIRequest, project_id: str, mapped_m
     if request.tools:
         function_declarations = []
         for tool in request.tools:
+            if not isinstance(tool, dict):
+                continue
             func = tool.get("function", tool)
+            if not isinstance(func, dict):
+                continue
             # Basic cleaning
             func_copy = {k: v for k, v in func.items() if k not in ["type", "strict", "additionalProperties"]}
             if "parameters" in func_copy:
@@ -140,7 +137,11 @@ def transform_openai_to_gemini(request: OpenAIRequest, project_id: str, mapped_m
     
     # 6. Add System Instruction
     if system_instructions:
-        inner_request["systemInstruction"] = {"parts": [{"text": "\n\n".join(system_instructions)}]}
+        if len(system_instructions) == 1:
+            system_text = system_instructions[0]
+        else:
+            system_text = "\n\n".join(system_instructions)
+        inner_request["systemInstruction"] = {"parts": [{"text": system_text}]}
     
     # 7. Wrap in final request structure
     return {
@@ -153,26 +154,70 @@ def transform_openai_to_gemini(request: OpenAIRequest, project_id: str, mapped_m
     }
 
 
-def _clean_json_schema(schema: Dict[str, Any]):
+def _content_block_to_part(block: Any) -> Optional[Dict[str, Any]]:
     """
-    Recursively clean a JSON Schema to be compatible with Gemini's requirements.
-    Gemini only supports a subset of JSON Schema keywords.
+    Convert a single OpenAI content block into a Gemini part.
+    Returns None for unsupported or malformed blocks.
     """
-    allowed_keys = {"type", "description", "properties", "required", "items", "enum", "format", "nullable"}
-    keys_to_remove = [k for k in schema.keys() if k not in allowed_keys]
-    for k in keys_to_remove:
-        del schema[k]
+    if not isinstance(block, dict):
+        return None
     
-    # Convert type to uppercase (Gemini convention)
-    if "type" in schema and isinstance(schema["type"], str):
-        schema["type"] = schema["type"].upper()
+    block_type = block.get("type")
+    if block_type == "text":
+        return {"text": block.get("text", "")}
     
-    # Recurse into properties
-    if "properties" in schema and isinstance(schema["properties"], dict):
-        for prop_schema in schema["properties"].values():
-            if isinstance(prop_schema, dict):
-                _clean_json_schema(prop_schema)
+    if block_type == "image_url":
+        image_url_data = block.get("image_url", {})
+        url = image_url_data.get("url", "")
+        if url.startswith("data:"):
+            # Base64 encoded image
+            try:
+                meta, data = url.split(",", 1)
+                mime_type = meta.split(":")[1].split(";")[0]
+                return {"inlineData": {"mimeType": mime_type, "data": data}}
+            except (ValueError, IndexError):
+                return None  # Skip malformed data URLs
+        if url.startswith("http"):
+            return {"fileData": {"fileUri": url, "mimeType": "image/jpeg"}}
+    
+    return None
+
+
+_ALLOWED_SCHEMA_KEYS = frozenset({"type", "description", "properties", "required", "items", "enum", "format", "nullable"})
+
+
+def _clean_json_schema(schema: Dict[str, Any]):
+    """
+    Clean a JSON Schema in place to be compatible with Gemini's requirements.
+    Gemini only supports a subset of JSON Schema keywords.
     
-    # Recurse into items
-    if "items" in schema and isinstance(schema["items"], dict):
-        _clean_json_schema(schema["items"])
+    Walks nested properties/items with an explicit stack instead of recursion,
+    so deeply nested schemas don't hit the recursion limit and shared or
+    cyclic sub-schemas are only cleaned once.
+    """
+    stack = deque([schema])
+    visited = set()
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict) or id(node) in visited:
+            continue
+        visited.add(id(node))
+        
+        keys_to_remove = [k for k in node if k not in _ALLOWED_SCHEMA_KEYS]
+        for k in keys_to_remove:
+            del node[k]
+        
+        # Convert type to uppercase (Gemini convention)
+        node_type = node.get("type")
+        if isinstance(node_type, str):
+            node["type"] = node_type.upper()
+        
+        # Descend into properties
+        properties = node.get("properties")
+        if isinstance(properties, dict):
+            stack.extend(properties.values())
+        
+        # Descend into items
+        items = node.get("items")
+        if isinstance(items, dict):
+            stack.append(items)
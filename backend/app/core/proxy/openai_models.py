@@ -4,8 +4,8 @@ OpenAI Protocol Models
 These Pydantic models define the structure of OpenAI API requests and responses.
 They are used for validation and serialization.
 """
-from typing import Optional, List, Union, Any, Dict
-from pydantic import BaseModel, Field
+from typing import Optional, List, Union, Any
+from pydantic import BaseModel, ConfigDict, Field
 
 class OpenAIImageUrl(BaseModel):
     url: str
@@ -23,17 +23,22 @@ class OpenAIContentBlockImage(BaseModel):
 OpenAIContentBlock = Union[OpenAIContentBlockText, OpenAIContentBlockImage]
 
 class OpenAIFunctionCall(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str
     arguments: str
 
 class OpenAIToolCall(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     type: str = "function"
     function: OpenAIFunctionCall
 
 class OpenAIMessage(BaseModel):
     role: str
-    content: Optional[Union[str, List[Dict[str, Any]]]] = None
+    # Content blocks are passed through unvalidated; the mapper checks shapes itself
+    content: Optional[Union[str, List[Any]]] = None
     tool_calls: Optional[List[OpenAIToolCall]] = None
     tool_call_id: Optional[str] = None
     name: Optional[str] = None
@@ -50,26 +55,34 @@ class OpenAIRequest(BaseModel):
     top_p: Optional[float] = None
     stop: Optional[Union[str, List[str]]] = None
     response_format: Optional[OpenAIResponseFormat] = None
-    tools: Optional[List[Dict[str, Any]]] = None
+    tools: Optional[List[Any]] = None  # Cleaned by the mapper, not validated here
     tool_choice: Optional[Any] = None
 
 # --- OpenAI Response Models ---
 class OpenAIChoiceMessage(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     role: str = "assistant"
     content: Optional[str] = None
     tool_calls: Optional[List[OpenAIToolCall]] = None
 
 class OpenAIChoice(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     index: int = 0
     message: OpenAIChoiceMessage
     finish_reason: Optional[str] = "stop"
 
 class OpenAIUsage(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     prompt_tokens: int = 0
     completion_tokens: int = 0
     total_tokens: int = 0
 
 class OpenAIChatCompletionResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     object: str = "chat.completion"
     created: int
@@ -5,18 +5,19 @@ Transforms Gemini API responses back into OpenAI API format.
 """
 import time
 import uuid
+import orjson
 from typing import Any, Dict, Optional
-from .openai_models import (
-    OpenAIChatCompletionResponse,
-    OpenAIChoice,
-    OpenAIChoiceMessage,
-    OpenAIUsage,
-    OpenAIToolCall,
-    OpenAIFunctionCall,
-)
 
+# Gemini finishReason -> OpenAI finish_reason
+_GEMINI_FINISH_REASONS = {
+    "STOP": "stop",
+    "MAX_TOKENS": "length",
+    "SAFETY": "content_filter",
+    "RECITATION": "content_filter",
+}
 
-def transform_gemini_to_openai(gemini_response: Dict[str, Any], model: str) -> OpenAIChatCompletionResponse:
+
+def transform_gemini_to_openai(gemini_response: Dict[str, Any], model: str) -> Dict[str, Any]:
     """
     Transform a Gemini GenerateContent response into OpenAI ChatCompletion format.
     
@@ -25,7 +26,8 @@ def transform_gemini_to_openai(gemini_response: Dict[str, Any], model: str) -> O
         model: The model name to include in the response.
     
     Returns:
-        An OpenAI-formatted ChatCompletion response.
+        An OpenAI-formatted ChatCompletion response as a plain dict, shaped
+        like OpenAIChatCompletionResponse and ready for direct serialization.
     """
     candidates = gemini_response.get("candidates", [])
     
@@ -37,64 +39,68 @@ def transform_gemini_to_openai(gemini_response: Dict[str, Any], model: str) -> O
         candidate = candidates[0]
         parts = candidate.get("content", {}).get("parts", [])
         
-        text_parts = []
+        # Most responses carry a single text part, so only fall back to a
+        # list + join once a second text part shows up.
+        first_text: Optional[str] = None
+        text_parts: Optional[list] = None
         function_calls = []
         
         for part in parts:
             if "text" in part:
-                text_parts.append(part["text"])
+                if first_text is None:
+                    first_text = part["text"]
+                else:
+                    if text_parts is None:
+                        text_parts = [first_text]
+                    text_parts.append(part["text"])
             elif "functionCall" in part:
                 fc = part["functionCall"]
-                function_calls.append(OpenAIToolCall(
-                    id=f"call_{uuid.uuid4().hex[:8]}",
-                    type="function",
-                    function=OpenAIFunctionCall(
-                        name=fc.get("name", ""),
-                        arguments=_dict_to_json_string(fc.get("args", {}))
-                    )
-                ))
+                function_calls.append({
+                    "id": f"call_{uuid.uuid4().hex[:8]}",
+                    "type": "function",
+                    "function": {
+                        "name": fc.get("name", ""),
+                        "arguments": _dict_to_json_string(fc.get("args", {}))
+                    }
+                })
         
-        if text_parts:
+        if text_parts is not None:
             content = "".join(text_parts)
+        elif first_text is not None:
+            content = first_text
         if function_calls:
             tool_calls = function_calls
             finish_reason = "tool_calls"
-        
-        # Map Gemini finish reason to OpenAI
-        gemini_finish = candidate.get("finishReason", "")
-        if gemini_finish == "STOP":
-            finish_reason = "stop"
-        elif gemini_finish == "MAX_TOKENS":
-            finish_reason = "length"
+        else:
+            # Map Gemini finish reason to OpenAI (tool calls always win)
+            finish_reason = _GEMINI_FINISH_REASONS.get(candidate.get("finishReason", ""), "stop")
     
     # Extract usage metadata
     usage_meta = gemini_response.get("usageMetadata", {})
-    usage = OpenAIUsage(
-        prompt_tokens=usage_meta.get("promptTokenCount", 0),
-        completion_tokens=usage_meta.get("candidatesTokenCount", 0),
-        total_tokens=usage_meta.get("totalTokenCount", 0)
-    )
     
-    return OpenAIChatCompletionResponse(
-        id=f"chatcmpl-{uuid.uuid4().hex[:12]}",
-        object="chat.completion",
-        created=int(time.time()),
-        model=model,
-        choices=[
-            OpenAIChoice(
-                index=0,
-                message=OpenAIChoiceMessage(
-                    role="assistant",
-                    content=content,
-                    tool_calls=tool_calls
-                ),
-                finish_reason=finish_reason
-            )
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {
+                    "role": "assistant",
+                    "content": content,
+                    "tool_calls": tool_calls
+                },
+                "finish_reason": finish_reason
+            }
         ],
-        usage=usage
-    )
+        "usage": {
+            "prompt_tokens": usage_meta.get("promptTokenCount", 0),
+            "completion_tokens": usage_meta.get("candidatesTokenCount", 0),
+            "total_tokens": usage_meta.get("totalTokenCount", 0)
+        }
+    }
 
 
 def _dict_to_json_string(d: Dict[str, Any]) -> str:
-    import json
-    return json.dumps(d)
+    return orjson.dumps(d).decode()
@@ -4,12 +4,36 @@ Upstream Client
 Handles making requests to the Google Gemini API via cloudcode-pa.
 """
 import httpx
+import orjson
 from typing import Any, Dict, Optional, AsyncIterator
-import json
 
 # v1internal API endpoint (same as Antigravity desktop app)
 V1_INTERNAL_BASE_URL = "https://cloudcode-pa.googleapis.com/v1internal"
 
+# Shared client: one HTTP/2 connection pool reused across all upstream calls
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared upstream AsyncClient (HTTP/2, keep-alive)."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(300.0, connect=10.0),
+            limits=httpx.Limits(max_keepalive_connections=200),
+            follow_redirects=False,
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared upstream AsyncClient (called on shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 async def call_gemini_api(
     payload: Dict[str, Any],
     access_token: str,
@@ -38,21 +62,40 @@ async def call_gemini_api(
         "Host": "cloudcode-pa.googleapis.com",
     }
     
-    async with httpx.AsyncClient(timeout=300.0) as client:
-        response = await client.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        
-        result = response.json()
-        # Unwrap v1internal response wrapper if present
-        if "response" in result:
-            return result["response"]
-        return result
+    client = get_http_client()
+    response = await client.post(url, json=payload, headers=headers)
+    response.raise_for_status()
+    
+    result = response.json()
+    # Unwrap v1internal response wrapper if present
+    if "response" in result:
+        return result["response"]
+    return result
+
+
+async def _iter_sse(byte_stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Split a raw byte stream into SSE lines without decoding to str.
+    
+    Args:
+        byte_stream: Async iterator of raw response bytes.
+    
+    Yields:
+        Individual lines, without the trailing newline / carriage return.
+    """
+    buffer = b""
+    async for chunk in byte_stream:
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if buffer:
+        yield buffer.rstrip(b"\r")
 
 
 async def stream_gemini_api(
     payload: Dict[str, Any],
     access_token: str
-) -> AsyncIterator[str]:
+) -> AsyncIterator[bytes]:
     """
     Make a streaming request to the Gemini API and yield SSE chunks.
     
@@ -61,7 +104,7 @@ async def stream_gemini_api(
         access_token: OAuth access token.
     
     Yields:
-        SSE formatted strings.
+        Complete SSE events as bytes, e.g. b"data: {...}" followed by a blank line.
     """
     url = f"{V1_INTERNAL_BASE_URL}:streamGenerateContent?alt=sse"
     
@@ -72,22 +115,26 @@ async def stream_gemini_api(
         "Host": "cloudcode-pa.googleapis.com",
     }
     
-    async with httpx.AsyncClient(timeout=300.0) as client:
-        async with client.stream("POST", url, json=payload, headers=headers) as response:
-            response.raise_for_status()
-            async for line in response.aiter_lines():
-                if line.startswith("data:"):
-                    # Unwrap v1internal response wrapper if present
-                    data_str = line[5:].strip()
-                    if data_str and data_str != "[DONE]":
-                        try:
-                            data = json.loads(data_str)
-                            if "response" in data:
-                                yield f"data: {json.dumps(data['response'])}"
-                            else:
-                                yield line
-                        except json.JSONDecodeError:
-                            yield line
-                    else:
-                        yield line
-
+    client = get_http_client()
+    async with client.stream("POST", url, json=payload, headers=headers) as response:
+        response.raise_for_status()
+        async for line in _iter_sse(response.aiter_bytes()):
+            if line.startswith(b"data:"):
+                # Unwrap v1internal response wrapper if present
+                data_str = line[5:].strip()
+                if data_str and data_str != b"[DONE]":
+                    # Cheap substring test: events without the wrapper
+                    # are passed through without being parsed at all.
+                    if b'"response"' not in data_str:
+                        yield line + b"\n\n"
+                        continue
+                    try:
+                        data = orjson.loads(data_str)
+                        if isinstance(data, dict) and "response" in data:
+                            yield b"data: " + orjson.dumps(data["response"]) + b"\n\n"
+                        else:
+                            yield line + b"\n\n"
+                    except orjson.JSONDecodeError:
+                        yield line + b"\n\n"
+                else:
+                    yield line + b"\n\n"
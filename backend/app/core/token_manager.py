@@ -9,15 +9,38 @@ Manages a pool of accounts for API requests with:
 - 429 retry with account switching
 """
 import asyncio
+import heapq
+import itertools
+import logging
 import time
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import DefaultDict, Dict, List, Optional, Tuple
 from threading import Lock
+from sqlalchemy import bindparam, update
 from sqlmodel import Session, select
 
 from app.core.database import engine
-from app.core.oauth import refresh_access_token, fetch_account_info
-from app.models.account import Account
+from app.core.oauth import DEFAULT_PROJECT_ID, refresh_access_token, fetch_account_info
+from app.core.proxy.upstream import get_http_client
+from app.models.account import Account, Token
+
+logger = logging.getLogger(__name__)
+
+# Quota groups averaged into average_quota by update_quotas
+_CLOUD_CODE_URL = "https://cloudcode-pa.googleapis.com/v1internal"
+_QUOTA_GROUPS = {
+    "claude_gpt": "claude-sonnet-4-5-thinking",
+    "gemini_pro": "gemini-3-pro-high",
+    "gemini_flash": "gemini-3-flash"
+}
+_QUOTA_MODEL_NAMES = tuple(_QUOTA_GROUPS.values())
+
+# How long get_token waits before retrying a failed metadata fetch
+_METADATA_RETRY_SECONDS = 300
+
+# Core table for the save helpers: plain UPDATEs, no SELECT/identity-map round trip
+_token_table = Token.__table__
 
 
 @dataclass
@@ -32,6 +55,17 @@ class ProxyToken:
     project_id: Optional[str] = None
     subscription_tier: Optional[str] = None  # FREE/PRO/ULTRA
     average_quota: Optional[float] = None    # Cached avg quota for routing
+    
+    @property
+    def effective_project_id(self) -> str:
+        """Project to send upstream: project_id, or the fallback while metadata is unknown."""
+        return self.project_id or DEFAULT_PROJECT_ID
+
+
+def _is_pro_tier(subscription_tier: Optional[str]) -> bool:
+    """Whether a subscription tier counts as PRO/ULTRA."""
+    tier = (subscription_tier or "").lower()
+    return "pro" in tier or "ultra" in tier
 
 
 class TokenManager:
@@ -48,33 +82,53 @@ class TokenManager:
     
     def __init__(self):
         self._tokens: Dict[str, ProxyToken] = {}
-        self._current_index: int = 0
-        self._last_used: Optional[Tuple[str, float]] = None  # (account_id, timestamp)
+        self._rr_counter = itertools.count()  # Round-robin cursor; next() is atomic under the GIL
+        self._last_used: Optional[Tuple[str, float]] = None  # (account_id, monotonic timestamp)
         self._lock = Lock()
-        self._refresh_lock = asyncio.Lock()
+        # Per-account refresh locks: one account's refresh never blocks another's
+        self._refresh_locks: DefaultDict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        # account_id -> monotonic time of the last failed metadata fetch
+        self._metadata_failures: Dict[str, float] = {}
+        # Read-only selection snapshots, rebuilt only when quotas/tiers change
+        self._all_tokens: Tuple[ProxyToken, ...] = ()  # routing order, for round-robin indexing
+        self._top_by_quota: List[ProxyToken] = []     # top 3 with quota > 0.05, descending
+        self._similar_top: List[ProxyToken] = []      # those within 90% of the best (needs 3 candidates)
+        self._pro_ultra: List[ProxyToken] = []                # PRO/ULTRA accounts, routing order
+        self._pro_ultra_with_quota: List[ProxyToken] = []     # best PRO/ULTRA with quota > 0.05 (0 or 1)
+        self._selection_version: int = 0
+        # quota_group -> (result, selected_at (monotonic), selection_version) for the current sticky selection
+        self._selection_cache: Dict[str, Tuple[Tuple[str, str, str], float, int]] = {}
+        # (selection_version, static account fields) for get_all_accounts
+        self._account_summary_cache: Optional[Tuple[int, List[tuple]]] = None
     
     async def load_accounts(self) -> int:
         """Load all accounts from database into memory pool."""
         with Session(engine) as session:
-            accounts = session.exec(select(Account)).all()
+            # Best quota first (ix_token_routing), so pool order follows routing rank
+            rows = session.exec(
+                select(Token, Account.email)
+                .join(Account, Token.account_id == Account.id)
+                .order_by(Token.average_quota.desc().nulls_last(), Token.expiry_timestamp)
+            ).all()
             count = 0
             
-            for acc in accounts:
-                if acc.token and acc.token.access_token:
-                    self._tokens[acc.id] = ProxyToken(
-                        account_id=acc.id,
-                        email=acc.email,
-                        access_token=acc.token.access_token,
-                        refresh_token=acc.token.refresh_token,
-                        expires_in=acc.token.expires_in,
-                        expiry_timestamp=acc.token.expiry_timestamp,
-                        project_id=acc.token.project_id,
-                        subscription_tier=acc.token.subscription_tier,
-                        average_quota=acc.token.average_quota,
+            for token, email in rows:
+                if token.access_token:
+                    self._tokens[token.account_id] = ProxyToken(
+                        account_id=token.account_id,
+                        email=email,
+                        access_token=token.access_token,
+                        refresh_token=token.refresh_token,
+                        expires_in=token.expires_in,
+                        expiry_timestamp=token.expiry_timestamp,
+                        project_id=token.project_id,
+                        subscription_tier=token.subscription_tier,
+                        average_quota=token.average_quota,
                     )
                     count += 1
             
-            return count
+        self._rebuild_selection()
+        return count
     
     def reload_account(self, account_id: str) -> bool:
         """Reload a single account from database."""
@@ -92,9 +146,44 @@ class TokenManager:
                     subscription_tier=acc.token.subscription_tier,
                     average_quota=acc.token.average_quota,
                 )
+                self._rebuild_selection()
                 return True
         return False
     
+    def _rebuild_selection(self):
+        """
+        Rebuild the quota-ranked selection snapshots.
+        
+        Must be called after anything that changes the pool, average_quota
+        or subscription_tier. Readers grab the list reference once and never
+        mutate it, so get_token doesn't need the lock.
+        """
+        with self._lock:
+            # Snapshot once (list() over a dict is atomic) and order the round-robin
+            # snapshots like load_accounts; _tokens itself stays a stable mapping
+            tokens = sorted(
+                list(self._tokens.values()),
+                key=lambda t: (t.average_quota is None, -(t.average_quota or 0.0), t.expiry_timestamp),
+            )
+            with_quota = [t for t in tokens if t.average_quota is not None and t.average_quota > 0.05]
+            quota_key = lambda t: t.average_quota
+            # Selection only ever looks at the top 3, so skip the full sort
+            top = heapq.nlargest(3, with_quota, key=quota_key)
+            similar: List[ProxyToken] = []
+            if len(top) >= 3:
+                threshold = top[0].average_quota * 0.9
+                similar = [t for t in top if t.average_quota >= threshold]
+            # Classify each tier once here instead of on every image_gen request
+            pro_ids = {t.account_id for t in tokens if _is_pro_tier(t.subscription_tier)}
+            self._all_tokens = tuple(tokens)
+            self._top_by_quota = top
+            self._similar_top = similar
+            self._pro_ultra = [t for t in tokens if t.account_id in pro_ids]
+            self._pro_ultra_with_quota = heapq.nlargest(
+                1, (t for t in with_quota if t.account_id in pro_ids), key=quota_key
+            )
+            self._selection_version += 1
+    
     @property
     def pool_size(self) -> int:
         """Number of accounts in pool."""
@@ -121,16 +210,26 @@ class TokenManager:
         if not self._tokens:
             raise ValueError("Token pool is empty. Please add accounts first.")
         
-        account_ids = list(self._tokens.keys())
-        total = len(account_ids)
+        # Read the clocks once: monotonic for the sticky window, wall clock for token expiry
+        now_mono = time.monotonic()
+        now_wall = int(time.time())
+        
+        # 0. Fast path: reuse the cached sticky selection while nothing it depends on changed.
+        # Safe to skip the expiry check: a cached token had > 300s left when cached, and
+        # entries live at most 60s.
+        if not force_rotate and quota_group != "image_gen":
+            cached = self._selection_cache.get(quota_group)
+            if cached is not None and cached[2] == self._selection_version and now_mono - cached[1] < 60:
+                return cached[0]
         
         # 1. Check 60-second time-window lock (sticky session)
         selected_token: Optional[ProxyToken] = None
+        fresh_selection = False
         
         if not force_rotate and quota_group != "image_gen":
             if self._last_used:
                 last_id, last_time = self._last_used
-                if time.time() - last_time < 60:
+                if now_mono - last_time < 60:
                     if last_id in self._tokens:
                         selected_token = self._tokens[last_id]
                         # print(f"[TokenManager] 60s sticky: reusing {selected_token.email}")
@@ -140,92 +239,80 @@ class TokenManager:
             # For image generation, use all accounts (testing if FREE accounts have access)
             # Previously filtered to PRO/ULTRA only, but user wants to test FREE too
             if quota_group == "image_gen":
-                all_tokens = list(self._tokens.values())
+                all_tokens = self._all_tokens
                 if not all_tokens:
                     raise ValueError("No accounts available for image generation.")
                 
                 # Prefer PRO/ULTRA but include FREE in rotation
-                pro_tokens = [
-                    t for t in all_tokens
-                    if t.subscription_tier and ('pro' in t.subscription_tier.lower() or 'ultra' in t.subscription_tier.lower())
-                ]
+                pro_tokens = self._pro_ultra
                 
                 # If force_rotate, always round-robin through ALL accounts to test
                 if force_rotate:
-                    with self._lock:
-                        idx = self._current_index % len(all_tokens)
-                        self._current_index += 1
+                    idx = next(self._rr_counter) % len(all_tokens)
                     selected_token = all_tokens[idx]
-                    tier = selected_token.subscription_tier or "unknown"
-                    print(f"[TokenManager] Force rotate for image_gen: selected {selected_token.email} (tier={tier}, idx={idx}/{len(all_tokens)})")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(
+                            "[TokenManager] Force rotate for image_gen: selected %s (tier=%s, idx=%d/%d)",
+                            selected_token.email, selected_token.subscription_tier or "unknown", idx, len(all_tokens),
+                        )
                 else:
                     # First try: prefer PRO/ULTRA with highest quota
                     if pro_tokens:
-                        pro_with_quota = [t for t in pro_tokens if t.average_quota is not None and t.average_quota > 0.05]
+                        pro_with_quota = self._pro_ultra_with_quota
                         if pro_with_quota:
-                            pro_with_quota.sort(key=lambda t: t.average_quota or 0, reverse=True)
                             selected_token = pro_with_quota[0]
                         else:
-                            with self._lock:
-                                idx = self._current_index % len(pro_tokens)
-                                self._current_index += 1
+                            idx = next(self._rr_counter) % len(pro_tokens)
                             selected_token = pro_tokens[idx]
                     else:
                         # No PRO accounts, use any account
-                        with self._lock:
-                            idx = self._current_index % len(all_tokens)
-                            self._current_index += 1
+                        idx = next(self._rr_counter) % len(all_tokens)
                         selected_token = all_tokens[idx]
             else:
-                # Normal selection: Sort accounts by average_quota (descending), None values go last
-                tokens_with_quota = [
-                    t for t in self._tokens.values() 
-                    if t.average_quota is not None and t.average_quota > 0.05
-                ]
+                # Normal selection: accounts by average_quota (descending), from the precomputed snapshot
+                tokens_with_quota = self._top_by_quota
                 
                 if tokens_with_quota:
-                    # Sort by quota descending
-                    tokens_with_quota.sort(key=lambda t: t.average_quota or 0, reverse=True)
                     # Pick the best one (or round-robin among top 3 if similar)
-                    if len(tokens_with_quota) >= 3:
-                        top_quota = tokens_with_quota[0].average_quota or 0
-                        similar = [t for t in tokens_with_quota[:3] if (t.average_quota or 0) >= top_quota * 0.9]
-                        if len(similar) > 1:
-                            # Round-robin among similar high-quota accounts
-                            with self._lock:
-                                idx = self._current_index % len(similar)
-                                self._current_index += 1
-                            selected_token = similar[idx]
-                        else:
-                            selected_token = tokens_with_quota[0]
+                    similar = self._similar_top
+                    if len(similar) > 1:
+                        # Round-robin among similar high-quota accounts
+                        idx = next(self._rr_counter) % len(similar)
+                        selected_token = similar[idx]
                     else:
                         selected_token = tokens_with_quota[0]
                 else:
                     # Fallback to round-robin if no quota data
-                    with self._lock:
-                        idx = self._current_index % total
-                        self._current_index += 1
-                    
-                    account_id = account_ids[idx]
-                    selected_token = self._tokens[account_id]
+                    all_tokens = self._all_tokens
+                    idx = next(self._rr_counter) % len(all_tokens)
+                    selected_token = all_tokens[idx]
                 
                 # Update sticky session (except for image generation)
-                self._last_used = (selected_token.account_id, time.time())
+                self._last_used = (selected_token.account_id, now_mono)
+                fresh_selection = True
         
         # 3. Check if token needs refresh (5 minutes before expiry)
-        now = int(time.time())
-        if now >= selected_token.expiry_timestamp - 300:
-            selected_token = await self._refresh_token(selected_token)
+        if now_wall >= selected_token.expiry_timestamp - 300:
+            selected_token = await self._refresh_token(selected_token, now=now_wall)
         
         # 4. Ensure project_id is available (and subscription_tier)
+        # Failed lookups are retried at most every _METADATA_RETRY_SECONDS; until then use the fallback
         if not selected_token.project_id:
-            selected_token = await self._fetch_metadata(selected_token)
+            failed_at = self._metadata_failures.get(selected_token.account_id)
+            if failed_at is None or now_mono - failed_at >= _METADATA_RETRY_SECONDS:
+                selected_token = await self._fetch_metadata(selected_token)
         
-        return (
+        result = (
             selected_token.access_token,
-            selected_token.project_id or "bamboo-precept-lgxtn",  # Use fallback project_id if None
+            selected_token.effective_project_id,
             selected_token.email
         )
+        
+        # A new sticky selection replaces every cached group, matching the shared sticky session
+        if fresh_selection:
+            self._selection_cache = {quota_group: (result, self._last_used[1], self._selection_version)}
+        
+        return result
     
     async def rotate_on_error(self) -> Optional[Tuple[str, str, str]]:
         """Force rotation to next account after error (e.g., 429)."""
@@ -233,90 +320,119 @@ class TokenManager:
             return None
         return await self.get_token(force_rotate=True)
     
-    async def _refresh_token(self, token: ProxyToken) -> ProxyToken:
-        """Refresh an expiring token."""
-        async with self._refresh_lock:
+    async def _refresh_token(
+        self, token: ProxyToken, skip_recheck: bool = False, now: Optional[int] = None
+    ) -> ProxyToken:
+        """
+        Refresh an expiring token.
+        
+        skip_recheck: caller has just filtered by expiry (scheduler), don't check again.
+        now: wall-clock seconds the caller already read, to avoid another clock read.
+        """
+        async with self._refresh_locks[token.account_id]:
+            if now is None:
+                now = int(time.time())
             # Double-check after acquiring lock
-            now = int(time.time())
-            if now < token.expiry_timestamp - 300:
+            if not skip_recheck and now < token.expiry_timestamp - 300:
                 return token
             
             try:
-                print(f"[TokenManager] Refreshing token for {token.email}...")
+                logger.info("[TokenManager] Refreshing token for %s...", token.email)
                 new_token = await refresh_access_token(token.refresh_token)
                 
                 # Update in-memory token
                 token.access_token = new_token.access_token
                 token.expires_in = new_token.expires_in
                 token.expiry_timestamp = now + new_token.expires_in
+                # Cached selections hold the old access_token
+                self._selection_version += 1
                 
                 # Update in database
                 await self._save_token_to_db(token)
                 
-                print(f"[TokenManager] Token refreshed for {token.email}")
+                logger.info("[TokenManager] Token refreshed for %s", token.email)
                 return token
                 
             except Exception as e:
-                print(f"[TokenManager] Failed to refresh token for {token.email}: {e}")
+                logger.warning("[TokenManager] Failed to refresh token for %s: %s", token.email, e)
                 raise
     
     async def _fetch_metadata(self, token: ProxyToken) -> ProxyToken:
         """Fetch and save project_id and subscription_tier for an account."""
         try:
-            print(f"[TokenManager] Fetching metadata for {token.email}...")
+            logger.info("[TokenManager] Fetching metadata for %s...", token.email)
             project_id, subscription_tier = await fetch_account_info(token.access_token)
+            if project_id == DEFAULT_PROJECT_ID and subscription_tier is None:
+                # fetch_account_info swallows its errors and returns the fallback; don't persist that
+                raise ValueError("account info lookup failed, got fallback project")
             
+            self._metadata_failures.pop(token.account_id, None)
             token.project_id = project_id
             token.subscription_tier = subscription_tier
             
             # Update in database
             await self._save_metadata_to_db(token.account_id, project_id, subscription_tier)
+            self._rebuild_selection()
             
-            print(f"[TokenManager] Metadata for {token.email}: project={project_id}, tier={subscription_tier}")
+            logger.info("[TokenManager] Metadata for %s: project=%s, tier=%s", token.email, project_id, subscription_tier)
             return token
             
         except Exception as e:
-            print(f"[TokenManager] Failed to fetch metadata for {token.email}: {e}")
-            # Use default project_id
-            token.project_id = "bamboo-precept-lgxtn"
+            logger.warning("[TokenManager] Failed to fetch metadata for %s: %s", token.email, e)
+            # Leave project_id unset (effective_project_id falls back to DEFAULT_PROJECT_ID) and retry later
+            self._metadata_failures[token.account_id] = time.monotonic()
             return token
     
     async def _save_token_to_db(self, token: ProxyToken):
         """Save refreshed token to database."""
-        with Session(engine) as session:
-            acc = session.get(Account, token.account_id)
-            if acc and acc.token:
-                acc.token.access_token = token.access_token
-                acc.token.expires_in = token.expires_in
-                acc.token.expiry_timestamp = token.expiry_timestamp
-                session.add(acc)
-                session.commit()
+        with Session(engine) as session, session.begin():
+            session.execute(
+                update(_token_table)
+                .where(_token_table.c.account_id == token.account_id)
+                .values(
+                    access_token=token.access_token,
+                    expires_in=token.expires_in,
+                    expiry_timestamp=token.expiry_timestamp,
+                )
+            )
     
     async def _save_metadata_to_db(self, account_id: str, project_id: str, subscription_tier: Optional[str]):
         """Save project_id and subscription_tier to database."""
-        with Session(engine) as session:
-            acc = session.get(Account, account_id)
-            if acc and acc.token:
-                acc.token.project_id = project_id
-                if subscription_tier:
-                    acc.token.subscription_tier = subscription_tier
-                session.add(acc)
-                session.commit()
+        values = {"project_id": project_id}
+        if subscription_tier:
+            values["subscription_tier"] = subscription_tier
+        with Session(engine) as session, session.begin():
+            session.execute(
+                update(_token_table)
+                .where(_token_table.c.account_id == account_id)
+                .values(**values)
+            )
     
     def get_all_accounts(self) -> List[dict]:
         """Get summary of all accounts in pool."""
-        result = []
-        for token in self._tokens.values():
-            result.append({
-                "account_id": token.account_id,
-                "email": token.email,
-                "project_id": token.project_id,
-                "subscription_tier": token.subscription_tier,
-                "average_quota": token.average_quota,
-                "expiry_timestamp": token.expiry_timestamp,
-                "expires_in_seconds": max(0, token.expiry_timestamp - int(time.time())),
-            })
-        return result
+        # Static fields only change with the pool, so they're cached per selection version;
+        # only expires_in_seconds is computed per call
+        cached = self._account_summary_cache
+        if cached is None or cached[0] != self._selection_version:
+            rows = [
+                (t.account_id, t.email, t.effective_project_id, t.subscription_tier, t.average_quota, t.expiry_timestamp)
+                for t in self._tokens.values()
+            ]
+            cached = self._account_summary_cache = (self._selection_version, rows)
+        
+        now = int(time.time())
+        return [
+            {
+                "account_id": account_id,
+                "email": email,
+                "project_id": project_id,
+                "subscription_tier": subscription_tier,
+                "average_quota": average_quota,
+                "expiry_timestamp": expiry_timestamp,
+                "expires_in_seconds": max(0, expiry_timestamp - now),
+            }
+            for account_id, email, project_id, subscription_tier, average_quota, expiry_timestamp in cached[1]
+        ]
     
     async def refresh_all_expiring_tokens(self):
         """
@@ -326,17 +442,19 @@ class TokenManager:
         now = int(time.time())
         refreshed = 0
         
-        for token in list(self._tokens.values()):
-            if now >= token.expiry_timestamp - 300:  # Within 5 minutes of expiry
-                try:
-                    await self._refresh_token(token)
-                    refreshed += 1
-                    print(f"[Scheduler] Refreshed token for {token.email}")
-                except Exception as e:
-                    print(f"[Scheduler] Failed to refresh {token.email}: {e}")
+        # Within 5 minutes of expiry
+        expiring = [t for t in list(self._tokens.values()) if now >= t.expiry_timestamp - 300]
+        results = await asyncio.gather(*(self._refresh_token(t, skip_recheck=True, now=now) for t in expiring), return_exceptions=True)
+        
+        for token, result in zip(expiring, results):
+            if isinstance(result, Exception):
+                logger.warning("[Scheduler] Failed to refresh %s: %s", token.email, result)
+            else:
+                refreshed += 1
+                logger.info("[Scheduler] Refreshed token for %s", token.email)
         
         if refreshed > 0:
-            print(f"[Scheduler] Refreshed {refreshed} expiring tokens")
+            logger.info("[Scheduler] Refreshed %d expiring tokens", refreshed)
         
         return refreshed
     
@@ -344,79 +462,89 @@ class TokenManager:
         """
         Fetch and update average_quota for all accounts.
         Called by background scheduler every 10 minutes.
+        
+        All accounts are queried concurrently over the shared upstream
+        client, and the results are persisted in a single DB session.
         """
-        import httpx
+        tokens = list(self._tokens.values())
         
-        CLOUD_CODE_URL = "https://cloudcode-pa.googleapis.com/v1internal"
-        GROUPS = {
-            "claude_gpt": "claude-sonnet-4-5-thinking",
-            "gemini_pro": "gemini-3-pro-high",
-            "gemini_flash": "gemini-3-flash"
-        }
+        # 0. Self-heal missing metadata (Subscription Tier / project_id) first, so project_id is available below
+        missing = [t for t in tokens if not t.subscription_tier or not t.project_id]
+        if missing:
+            results = await asyncio.gather(*(self._fetch_metadata(t) for t in missing), return_exceptions=True)
+            for token, result in zip(missing, results):
+                if isinstance(result, Exception):
+                    logger.warning("[Scheduler] Failed to backfill metadata for %s: %s", token.email, result)
         
-        updated = 0
+        client = get_http_client()
         
-        for token in list(self._tokens.values()):
-            # 0. Self-heal missing metadata (Subscription Tier)
-            if not token.subscription_tier:
-                try:
-                    await self._fetch_metadata(token)
-                except Exception as e:
-                    print(f"[Scheduler] Failed to backfill metadata for {token.email}: {e}")
-
-            try:
-                headers = {
-                    "Authorization": f"Bearer {token.access_token}",
-                    "Content-Type": "application/json",
-                    "User-Agent": "antigravity/python/1.0",
-                }
-                
-                async with httpx.AsyncClient(timeout=15.0) as client:
-                    response = await client.post(
-                        f"{CLOUD_CODE_URL}:fetchAvailableModels",
-                        json={"project": token.project_id or ""},
-                        headers=headers
-                    )
-                    
-                    if response.status_code != 200:
-                        continue
-                    
-                    data = response.json()
-                    models = data.get("models", {})
-                    
-                    fractions = []
-                    for group_key, model_name in GROUPS.items():
-                        if model_name in models:
-                            quota_info = models[model_name].get("quotaInfo", {})
-                            remaining = quota_info.get("remainingFraction")
-                            if remaining is not None:
-                                fractions.append(remaining)
-                    
-                    if fractions:
-                        avg = sum(fractions) / len(fractions)
-                        token.average_quota = round(avg, 4)
-                        
-                        # Persist to database
-                        await self._save_average_quota_to_db(token.account_id, token.average_quota)
-                        updated += 1
-                        
-            except Exception as e:
-                print(f"[Scheduler] Failed to update quota for {token.email}: {e}")
+        async def _update_one(token: ProxyToken) -> Optional[Tuple[str, float]]:
+            headers = {
+                "Authorization": f"Bearer {token.access_token}",
+                "Content-Type": "application/json",
+                "User-Agent": "antigravity/python/1.0",
+            }
+            
+            response = await client.post(
+                f"{_CLOUD_CODE_URL}:fetchAvailableModels",
+                json={"project": token.effective_project_id},
+                headers=headers,
+                timeout=15.0,
+            )
+            
+            if response.status_code != 200:
+                return None
+            
+            data = response.json()
+            models = data.get("models", {})
+            
+            fractions = []
+            for model_name in _QUOTA_MODEL_NAMES:
+                if model_name in models:
+                    quota_info = models[model_name].get("quotaInfo", {})
+                    remaining = quota_info.get("remainingFraction")
+                    if remaining is not None:
+                        fractions.append(remaining)
+            
+            if not fractions:
+                return None
+            
+            avg = sum(fractions) / len(fractions)
+            token.average_quota = round(avg, 4)
+            return (token.account_id, token.average_quota)
+        
+        results = await asyncio.gather(*(_update_one(t) for t in tokens), return_exceptions=True)
         
+        quota_updates: List[Tuple[str, float]] = []
+        for token, result in zip(tokens, results):
+            if isinstance(result, Exception):
+                logger.warning("[Scheduler] Failed to update quota for %s: %s", token.email, result)
+            elif result is not None:
+                quota_updates.append(result)
+        
+        updated = len(quota_updates)
         if updated > 0:
-            print(f"[Scheduler] Updated quotas for {updated} accounts")
+            # Persist to database
+            await self._save_average_quotas_to_db(quota_updates)
+            self._rebuild_selection()
+            logger.info("[Scheduler] Updated quotas for %d accounts", updated)
         
         return updated
     
-    async def _save_average_quota_to_db(self, account_id: str, average_quota: float):
-        """Save average_quota to database."""
-        with Session(engine) as session:
-            acc = session.get(Account, account_id)
-            if acc and acc.token:
-                acc.token.average_quota = average_quota
-                session.add(acc)
-                session.commit()
-
+    async def _save_average_quotas_to_db(self, quota_updates: List[Tuple[str, float]]):
+        """Save average_quota for several accounts to database in one executemany UPDATE."""
+        if not quota_updates:
+            return
+        stmt = (
+            update(_token_table)
+            .where(_token_table.c.account_id == bindparam("b_account_id"))
+            .values(average_quota=bindparam("b_average_quota"))
+        )
+        with Session(engine) as session, session.begin():
+            session.execute(
+                stmt,
+                [{"b_account_id": account_id, "b_average_quota": avg} for account_id, avg in quota_updates],
+            )
 
 # Global singleton instance
 _token_manager: Optional[TokenManager] = None
@@ -434,5 +562,5 @@ async def init_token_manager() -> int:
     """Initialize and load accounts into TokenManager."""
     manager = get_token_manager()
     count = await manager.load_accounts()
-    print(f"[TokenManager] Loaded {count} accounts into pool")
+    logger.info("[TokenManager] Loaded %d accounts into pool", count)
     return count
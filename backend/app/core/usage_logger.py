@@ -2,12 +2,32 @@
 Usage Logger
 
 Helper to log API usage statistics asynchronously.
+
+log_usage() only enqueues the entry; a background task started in main.py
+(drain_usage_logs) writes queued entries to the database in batches.
 """
-from datetime import datetime
+import asyncio
+import logging
+import queue
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import insert
 from sqlmodel import Session
 from app.core.database import engine
 from app.models.usage import UsageLog
 
+logger = logging.getLogger(__name__)
+
+# Batching parameters for the background writer
+FLUSH_INTERVAL_SECONDS = 0.25
+MAX_BATCH_SIZE = 1000
+RETRY_DELAY_SECONDS = 1.0
+
+# Queued entries: (epoch_seconds, protocol, model, account_email, success,
+#                  status_code, response_time_ms, error_type)
+_LogEntry = Tuple[float, str, str, str, bool, int, int, Optional[str]]
+_log_queue: "queue.SimpleQueue[_LogEntry]" = queue.SimpleQueue()
+
 
 def log_usage(
     protocol: str,
@@ -19,8 +39,8 @@ def log_usage(
     error_type: str = None
 ):
     """
-    Log an API request to the usage_log table.
-    
+    Queue an API request for the usage_log table.
+
     Args:
         protocol: "openai", "claude", "gemini", "image_gen"
         model: Model name used
@@ -31,19 +51,76 @@ def log_usage(
         error_type: Optional error classification ("429", "403", "5xx", "network")
     """
     try:
-        with Session(engine) as session:
-            log_entry = UsageLog(
-                timestamp=datetime.utcnow(),
-                protocol=protocol,
-                model=model,
-                account_email=account_email,
-                success=success,
-                status_code=status_code,
-                response_time_ms=response_time_ms,
-                error_type=error_type
-            )
-            session.add(log_entry)
-            session.commit()
-    except Exception as e:
+        _log_queue.put_nowait((
+            time.time(),
+            protocol,
+            model,
+            account_email,
+            success,
+            status_code,
+            response_time_ms,
+            error_type,
+        ))
+    except Exception:
         # Don't let logging failures break the API
-        print(f"[UsageLogger] Failed to log usage: {e}")
+        logger.exception("[UsageLogger] Failed to log usage")
+
+
+def flush_usage_logs() -> int:
+    """
+    Write up to MAX_BATCH_SIZE queued entries in a single commit.
+
+    A failed insert (e.g. "database is locked") is retried once before the
+    batch is dropped.
+
+    Returns:
+        Number of entries written.
+    """
+    batch: List[_LogEntry] = []
+    while len(batch) < MAX_BATCH_SIZE:
+        try:
+            batch.append(_log_queue.get_nowait())
+        except queue.Empty:
+            break
+
+    if batch:
+        rows: List[Dict[str, Any]] = [
+            {
+                "timestamp_ms": int(ts * 1000),
+                "protocol": protocol,
+                "model": model,
+                "account_email": account_email,
+                "success": success,
+                "status_code": status_code,
+                "response_time_ms": response_time_ms,
+                "error_type": error_type,
+            }
+            for ts, protocol, model, account_email, success, status_code, response_time_ms, error_type in batch
+        ]
+        for attempt in range(2):
+            try:
+                # Core multi-row INSERT: bypasses ORM identity-map bookkeeping
+                with Session(engine) as session:
+                    session.execute(insert(UsageLog.__table__), rows)
+                    session.commit()
+                break
+            except Exception:
+                if attempt:
+                    logger.exception("[UsageLogger] Dropped %d usage log entries after retry", len(batch))
+                    return 0
+                logger.warning("[UsageLogger] Failed to write %d usage log entries, retrying", len(batch))
+                time.sleep(RETRY_DELAY_SECONDS)
+    return len(batch)
+
+
+async def drain_usage_logs():
+    """Background task: periodically flush queued usage logs to the database."""
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+        try:
+            # Keep flushing while full batches come back (backlog)
+            while await asyncio.to_thread(flush_usage_logs) == MAX_BATCH_SIZE:
+                pass
+        except Exception:
+            # Don't let logging failures kill the writer
+            logger.exception("[UsageLogger] Failed to write usage logs")
@@ -7,7 +7,7 @@ import logging
 from logging.handlers import RotatingFileHandler
 import os
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 
 # ============================================================================
 # Logging Configuration
@@ -69,58 +69,52 @@ app.add_middleware(
 )
 
 
+from app.core.auth import get_cached_user_by_api_key
+
+
+# Proxy route prefixes that require an API key
+_PROXY_PREFIXES = ("/v1", "/v1beta")
+
+
 # API Key validation middleware for proxy routes
 class APIKeyMiddleware(BaseHTTPMiddleware):
     """Validate API key for proxy routes (/v1/*, /v1beta/*)."""
     
     async def dispatch(self, request: Request, call_next):
         path = request.url.path
-        method = request.method
         
-        # Skip OPTIONS requests (CORS preflight)
-        # Fix double /v1beta prefix (common client configuration error)
         # Fix double /v1beta prefix (common client configuration error)
-        if path.startswith("/v1beta/v1beta"):
-            new_path = path.replace("/v1beta/v1beta", "/v1beta", 1)
+        if path[:14] == "/v1beta/v1beta":
+            new_path = path[7:]
             print(f"[Path Fix] Rewriting {path} -> {new_path}")
             request.scope["path"] = new_path
             path = new_path
         
-        # Only validate proxy routes
-        if path.startswith("/v1") or path.startswith("/v1beta"):
-            from app.core.auth import get_user_by_api_key
-            
-            # Extract API key from Authorization header
-            auth_header = request.headers.get("Authorization", "")
-            x_goog_api_key = request.headers.get("x-goog-api-key", "")
-            api_key = None
-            
-            if auth_header.startswith("Bearer "):
-                api_key = auth_header[7:]
-            elif "x-api-key" in request.headers:
-                api_key = request.headers.get("x-api-key")
-            elif x_goog_api_key:
-                # Gemini SDK uses x-goog-api-key header
-                api_key = x_goog_api_key
-            
-            if not api_key:
-                # Check query parameter for Gemini SDK compatibility
-                api_key = request.query_params.get("key")
-            
-            if api_key:
-                user = get_user_by_api_key(api_key)
-                if user:
-                    # Valid API key, proceed
-                    return await call_next(request)
-            
-            # Invalid or missing API key
-            from fastapi.responses import JSONResponse
-            return JSONResponse(
-                status_code=401,
-                content={"error": "Invalid or missing API key"}
-            )
+        # Only validate proxy routes; everything else skips header parsing entirely
+        if not path.startswith(_PROXY_PREFIXES):
+            return await call_next(request)
+        
+        # Extract API key: Bearer token, then x-api-key, then x-goog-api-key (Gemini SDK)
+        headers = request.headers
+        auth_header = headers.get("authorization", "")
+        if auth_header.startswith("Bearer "):
+            api_key = auth_header[7:]
+        else:
+            api_key = headers.get("x-api-key") or headers.get("x-goog-api-key")
+        
+        if not api_key:
+            # Check query parameter for Gemini SDK compatibility
+            api_key = request.query_params.get("key")
+        
+        if api_key and get_cached_user_by_api_key(api_key):
+            # Valid API key, proceed
+            return await call_next(request)
         
-        return await call_next(request)
+        # Invalid or missing API key
+        return JSONResponse(
+            status_code=401,
+            content={"error": "Invalid or missing API key"}
+        )
 
 
 app.add_middleware(APIKeyMiddleware)
@@ -138,6 +132,8 @@ async def health_check():
 
 from app.core.database import create_db_and_tables
 from app.core.token_manager import init_token_manager, get_token_manager
+from app.core.proxy.upstream import close_http_client
+from app.core.usage_logger import drain_usage_logs, flush_usage_logs
 from app.api import routes_management, routes_openai, routes_claude, routes_import, routes_gemini, routes_oauth, routes_quota, routes_auth, routes_mapping, routes_images, routes_stats
 
 
@@ -185,6 +181,17 @@ async def on_startup():
     # Start background quota update task
     asyncio.create_task(background_quota_update())
     print("[Scheduler] Background quota update started (600s interval)")
+    # Start background usage log writer
+    asyncio.create_task(drain_usage_logs())
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # Write out any usage logs still queued
+    while flush_usage_logs():
+        pass
+    # Close the shared upstream connection pool
+    await close_http_client()
 
 # Auth APIs (no authentication required for login)
 app.include_router(routes_auth.router, prefix="/api/auth", tags=["Auth"])
@@ -227,17 +234,21 @@ if FRONTEND_DIST and os.path.exists(FRONTEND_DIST):
     # Mount assets directory
     app.mount("/assets", StaticFiles(directory=f"{FRONTEND_DIST}/assets"), name="assets")
     
+    # Resolved once at startup instead of a stat() per SPA request
+    INDEX_PATH = f"{FRONTEND_DIST}/index.html"
+    INDEX_EXISTS = os.path.exists(INDEX_PATH)
+    _API_PREFIXES = ("api/", "v1/", "v1beta/")
+    
     # SPA fallback: serve index.html for any other route
-    @app.get("/{full_path:path}")
-    async def serve_spa(full_path: str):
-        # Don't catch API routes (they are already handled above)
-        if full_path.startswith("api/") or full_path.startswith("v1/") or full_path.startswith("v1beta/"):
-            raise HTTPException(status_code=404, detail="API endpoint not found")
-            
-        index_path = f"{FRONTEND_DIST}/index.html"
-        if os.path.exists(index_path):
-            return FileResponse(index_path)
-        raise HTTPException(status_code=404, detail="Frontend index.html not found")
+    if INDEX_EXISTS:
+        @app.get("/{full_path:path}")
+        async def serve_spa(full_path: str):
+            # Don't catch API routes (they are already handled above)
+            if full_path.startswith(_API_PREFIXES):
+                raise HTTPException(status_code=404, detail="API endpoint not found")
+            return FileResponse(INDEX_PATH)
+    else:
+        logger.warning(f"Frontend index.html not found in {FRONTEND_DIST}, SPA fallback disabled")
 
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
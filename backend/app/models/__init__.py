@@ -1,2 +1,2 @@
-from .account import Account, Token, Quota, ModelQuota, AccountCreate, AccountRead
+from .account import Account, Token, Quota, ModelQuotaBase, AccountCreate, AccountRead
 from .usage import UsageLog, UsageLogCreate
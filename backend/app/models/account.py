@@ -1,10 +1,20 @@
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
+from pydantic import ConfigDict
+from sqlalchemy import JSON, Column, Index
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
+import threading
 import time
 
+_timestamp_cache = threading.local()
+
 def current_timestamp() -> int:
-    return int(time.time())
+    """Epoch seconds; the wall clock is re-read at most every 10 ms per thread (bulk imports)."""
+    now = time.monotonic()
+    if now - getattr(_timestamp_cache, "fetched_at", float("-inf")) > 0.01:
+        _timestamp_cache.value = int(time.time())
+        _timestamp_cache.fetched_at = now
+    return _timestamp_cache.value
 
 class TokenBase(SQLModel):
     access_token: str
@@ -19,6 +29,11 @@ class TokenBase(SQLModel):
     average_quota: Optional[float] = None    # Cached avg quota for routing
 
 class Token(TokenBase, table=True):
+    # Routing order: best quota first, soonest expiry breaking ties
+    __table_args__ = (
+        Index("ix_token_routing", "average_quota", "expiry_timestamp"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     account_id: str = Field(foreign_key="account.id")
     
@@ -29,12 +44,6 @@ class ModelQuotaBase(SQLModel):
     percentage: int
     reset_time: str
 
-class ModelQuota(ModelQuotaBase, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
-    quota_id: int = Field(foreign_key="quota.id")
-    
-    quota: "Quota" = Relationship(back_populates="models")
-
 class QuotaBase(SQLModel):
     last_updated: int = Field(default_factory=current_timestamp)
     is_forbidden: bool = False
@@ -45,7 +54,17 @@ class Quota(QuotaBase, table=True):
     account_id: str = Field(foreign_key="account.id")
     
     account: "Account" = Relationship(back_populates="quota")
-    models: List[ModelQuota] = Relationship(back_populates="quota", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
+    # Per-model quotas, stored inline: always read/written as a whole, never queried individually
+    models_json: Optional[List[Dict[str, Any]]] = Field(default=None, sa_column=Column(JSON))
+    
+    @property
+    def models(self) -> List[ModelQuotaBase]:
+        return [ModelQuotaBase(**m) for m in self.models_json or ()]
+    
+    @models.setter
+    def models(self, models: List[ModelQuotaBase]):
+        # Assign a new list so the JSON column change is tracked
+        self.models_json = [m.model_dump() for m in models]
 
 class AccountBase(SQLModel):
     id: str = Field(primary_key=True) # User provided or Google ID
@@ -55,12 +74,16 @@ class AccountBase(SQLModel):
     last_used: int = Field(default_factory=current_timestamp)
 
 class Account(AccountBase, table=True):
-    token: Optional[Token] = Relationship(back_populates="account", sa_relationship_kwargs={"uselist": False, "cascade": "all, delete-orphan"})
-    quota: Optional[Quota] = Relationship(back_populates="account", sa_relationship_kwargs={"uselist": False, "cascade": "all, delete-orphan"})
+    # selectin: loading a list of accounts fetches tokens/quotas with one IN query each, not N+1
+    token: Optional[Token] = Relationship(back_populates="account", sa_relationship_kwargs={"uselist": False, "cascade": "all, delete-orphan", "lazy": "selectin"})
+    quota: Optional[Quota] = Relationship(back_populates="account", sa_relationship_kwargs={"uselist": False, "cascade": "all, delete-orphan", "lazy": "selectin"})
 
 class AccountCreate(AccountBase):
     token: TokenBase
 
 class AccountRead(AccountBase):
+    """Read-only account DTO."""
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+    
     token: TokenBase
     quota: Optional[QuotaBase] = None
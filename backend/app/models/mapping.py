@@ -4,6 +4,7 @@ Model Mapping Model
 Allows users to define aliases for models, e.g. mapping 'gpt-4' to 'gemini-1.5-pro'.
 """
 from typing import Optional
+from pydantic import BaseModel, ConfigDict
 from sqlmodel import SQLModel, Field
 
 class ModelMapping(SQLModel, table=True):
@@ -17,7 +18,9 @@ class ModelMappingCreate(SQLModel):
     target_model: str
     description: Optional[str] = None
 
-class ModelMappingRead(SQLModel):
+class ModelMappingRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+    
     id: int
     source_model: str
     target_model: str
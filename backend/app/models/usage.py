@@ -3,15 +3,34 @@ Usage Log Model
 
 Records each API request for statistics tracking.
 """
+import time
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
+
+
+def current_timestamp_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def to_timestamp_ms(dt: datetime) -> int:
+    """Epoch milliseconds for a datetime (naive values are taken as UTC)."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
 
 
 class UsageLog(SQLModel, table=True):
     """Log entry for each API request."""
+    # Composite indexes for the per-account and success-rate stats queries
+    __table_args__ = (
+        Index("ix_usage_acct_ts", "account_email", "timestamp_ms"),
+        Index("ix_usage_success_ts", "success", "timestamp_ms"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp_ms: int = Field(default_factory=current_timestamp_ms, index=True)  # Epoch ms (UTC)
     
     # Request info
     protocol: str  # "openai", "claude", "gemini", "image_gen"
@@ -25,6 +44,11 @@ class UsageLog(SQLModel, table=True):
     
     # Error classification (if any)
     error_type: Optional[str] = None  # "429", "403", "5xx", "network", None
+    
+    @property
+    def timestamp(self) -> datetime:
+        """Request time as a naive UTC datetime."""
+        return datetime.fromtimestamp(self.timestamp_ms / 1000, timezone.utc).replace(tzinfo=None)
 
 
 class UsageLogCreate(SQLModel):
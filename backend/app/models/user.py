@@ -3,26 +3,89 @@ User Model
 
 Stores user credentials and API keys for authentication.
 """
-import secrets
+import base64
+import hmac
+import os
 import hashlib
+import threading
 from datetime import datetime
 from typing import Optional
+from pydantic import BaseModel, ConfigDict
 from sqlmodel import SQLModel, Field
 
+PBKDF2_ITERATIONS = 100_000
+
+
+class _ApiKeyPool:
+    """
+    Random bytes for API keys, drawn from os.urandom in 4 KiB blocks.
+    
+    Each byte is handed out once; the buffer is dropped in forked children
+    so two processes never issue the same key.
+    """
+    
+    BLOCK_SIZE = 4096
+    
+    def __init__(self):
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+    
+    def pop(self, n: int = 32) -> bytes:
+        with self._lock:
+            if len(self._buffer) < n:
+                self._buffer += os.urandom(max(self.BLOCK_SIZE, n))
+            chunk = bytes(self._buffer[:n])
+            del self._buffer[:n]
+            return chunk
+    
+    def clear(self):
+        with self._lock:
+            self._buffer = bytearray()
+
+
+_api_key_pool = _ApiKeyPool()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_api_key_pool.clear)
+
+
+def generate_api_key() -> str:
+    """Generate a new "sk-ag-" API key (32 random bytes, urlsafe base64)."""
+    return "sk-ag-" + base64.urlsafe_b64encode(_api_key_pool.pop(32)).rstrip(b"=").decode()
+
+
+def _pbkdf2_sha256(password: str, salt: bytes, iterations: int) -> bytes:
+    """PBKDF2-HMAC-SHA256 (runs in OpenSSL)."""
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations, dklen=32)
+
 
 def hash_password(password: str) -> str:
-    """Hash password using SHA-256 with salt."""
-    salt = secrets.token_hex(16)
-    hashed = hashlib.sha256((salt + password).encode()).hexdigest()
-    return f"{salt}:{hashed}"
+    """Hash password using PBKDF2-SHA256 ("pbkdf2_sha256${iterations}${salt_b64}${hash_b64}")."""
+    salt = os.urandom(16)
+    hashed = _pbkdf2_sha256(password, salt, PBKDF2_ITERATIONS)
+    return (
+        f"pbkdf2_sha256${PBKDF2_ITERATIONS}"
+        f"${base64.b64encode(salt).decode()}${base64.b64encode(hashed).decode()}"
+    )
 
 
 def verify_password(password: str, stored_hash: str) -> bool:
-    """Verify password against stored hash."""
+    """
+    Verify password against stored hash.
+    
+    Accepts PBKDF2 hashes plus the legacy SHA-256 ("{salt}:{hash}") format,
+    which login upgrades to PBKDF2.
+    """
     try:
+        if stored_hash.startswith("pbkdf2_sha256$"):
+            _, iterations, salt_b64, hash_b64 = stored_hash.split("$")
+            check = _pbkdf2_sha256(password, base64.b64decode(salt_b64), int(iterations))
+            return hmac.compare_digest(check, base64.b64decode(hash_b64))
+        
         salt, hashed = stored_hash.split(":")
-        check = hashlib.sha256((salt + password).encode()).hexdigest()
-        return check == hashed
+        # Feed salt and password separately instead of building salt + password
+        hasher = hashlib.sha256(salt.encode())
+        hasher.update(password.encode())
+        return hmac.compare_digest(hasher.hexdigest(), hashed)
     except ValueError:
         return False
 
@@ -32,7 +95,7 @@ class User(SQLModel, table=True):
     id: Optional[str] = Field(default=None, primary_key=True)
     username: str = Field(unique=True, index=True)
     hashed_password: str
-    api_key: str = Field(default_factory=lambda: f"sk-ag-{secrets.token_urlsafe(32)}")
+    api_key: str = Field(default_factory=generate_api_key)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     @classmethod
@@ -51,7 +114,7 @@ class User(SQLModel, table=True):
     
     def regenerate_api_key(self) -> str:
         """Generate a new API key."""
-        self.api_key = f"sk-ag-{secrets.token_urlsafe(32)}"
+        self.api_key = generate_api_key()
         return self.api_key
 
 
@@ -61,8 +124,10 @@ class UserLogin(SQLModel):
     password: str
 
 
-class UserResponse(SQLModel):
+class UserResponse(BaseModel):
     """User response schema (without sensitive fields)."""
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+    
     id: str
     username: str
     api_key: str
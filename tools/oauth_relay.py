@@ -12,7 +12,7 @@ USAGE:
     python oauth_relay.py --target https://your-production-server.com:56443
 
 REQUIREMENTS:
-    - Python 3.8+ (uses only standard library)
+    - Python 3.8+ (uses only standard library; orjson is used if installed)
 
 HOW IT WORKS:
     1. Run this script on your local machine
@@ -26,17 +26,32 @@ License: MIT
 """
 
 import argparse
+import http.client
 import json
 import ssl
+import threading
 import webbrowser
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
-from urllib.request import Request, urlopen
-from urllib.error import URLError
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qsl
+
+# orjson is optional: faster, and works on bytes directly
+try:
+    import orjson
+    json_dumps = orjson.dumps
+    json_loads = orjson.loads  # orjson.JSONDecodeError subclasses json.JSONDecodeError
+except ImportError:
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+    json_loads = json.loads
 
 # Default configuration
 DEFAULT_PORT = 8000
 
+# SSL context that doesn't verify certificates (for self-signed certs); built once
+SSL_CONTEXT = ssl.create_default_context()
+SSL_CONTEXT.check_hostname = False
+SSL_CONTEXT.verify_mode = ssl.CERT_NONE
+
 # HTML Templates
 SUCCESS_HTML = """
 <!DOCTYPE html>
@@ -217,10 +232,81 @@ WAITING_HTML = """
 """
 
 
+def split_template(template: str, *fields: str) -> list:
+    """
+    Split a str.format() template into static UTF-8 chunks around the
+    given placeholders (in order), so pages are written without re-formatting.
+    """
+    chunks = []
+    rest = template
+    for field in fields:
+        before, _, rest = rest.partition("{" + field + "}")
+        chunks.append(before.replace("{{", "{").replace("}}", "}").encode("utf-8"))
+    chunks.append(rest.replace("{{", "{").replace("}}", "}").encode("utf-8"))
+    return chunks
+
+
+SUCCESS_CHUNKS = split_template(SUCCESS_HTML, "email", "message")
+ERROR_CHUNKS = split_template(ERROR_HTML, "error")
+
+
+class ProductionConnection:
+    """
+    Persistent keep-alive connection to the production server.
+    
+    Successive relay callbacks reuse one TCP/TLS connection instead of
+    handshaking each time. Requests are serialized by a lock since the
+    relay server is threaded.
+    """
+    
+    def __init__(self):
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    def _connect(self, parsed) -> http.client.HTTPConnection:
+        if parsed.scheme == "https":
+            return http.client.HTTPSConnection(parsed.hostname, parsed.port, context=SSL_CONTEXT, timeout=30)
+        return http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+    
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def post_json(self, url: str, payload: dict):
+        """POST a JSON payload, returning (status, body bytes). Retries once on a stale connection."""
+        parsed = urlparse(url)
+        path = parsed.path or "/"
+        if parsed.query:
+            path += "?" + parsed.query
+        body = json_dumps(payload)
+        
+        with self._lock:
+            for attempt in range(2):
+                if self._conn is None:
+                    self._conn = self._connect(parsed)
+                try:
+                    self._conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+                    response = self._conn.getresponse()
+                    return response.status, response.read()
+                except (http.client.BadStatusLine, ConnectionResetError, BrokenPipeError):
+                    # Server closed the idle keep-alive connection; reconnect once
+                    self._close()
+                    if attempt:
+                        raise
+                except Exception:
+                    self._close()
+                    raise
+
+
+PRODUCTION = ProductionConnection()
+
+
 class OAuthRelayHandler(BaseHTTPRequestHandler):
     """HTTP request handler for OAuth relay."""
     
     target_url = ""  # Will be set by main()
+    waiting_page = b""  # Rendered once by main()
     
     def log_message(self, format, *args):
         """Custom log format with timestamps."""
@@ -237,16 +323,20 @@ class OAuthRelayHandler(BaseHTTPRequestHandler):
             self.send_response(200)
             self.send_header("Content-Type", "text/html; charset=utf-8")
             self.end_headers()
-            html = WAITING_HTML.format(target=self.target_url)
-            self.wfile.write(html.encode("utf-8"))
+            self.wfile.write(self.waiting_page)
             
         elif parsed.path == "/api/oauth/callback":
             # Handle Google OAuth callback
-            params = parse_qs(parsed.query)
+            # Single pass, no per-key lists; Google sends well under 16 fields
+            try:
+                params = dict(parse_qsl(parsed.query, max_num_fields=16))
+            except ValueError:
+                self.send_error_page("Malformed callback query string")
+                return
             
-            code = params.get("code", [None])[0]
-            state = params.get("state", [None])[0]
-            error = params.get("error", [None])[0]
+            code = params.get("code")
+            state = params.get("state")
+            error = params.get("error")
             
             print("\n" + "=" * 60)
             print("  📥 Received OAuth callback from Google")
@@ -290,23 +380,17 @@ class OAuthRelayHandler(BaseHTTPRequestHandler):
     def forward_to_production(self, code: str, state: str) -> dict:
         """Forward the OAuth code to production server."""
         url = f"{self.target_url}/api/oauth/relay-callback"
-        data = json.dumps({"code": code, "state": state}).encode("utf-8")
-        
-        # Create SSL context that doesn't verify certificates (for self-signed certs)
-        ctx = ssl.create_default_context()
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
         
         try:
-            req = Request(
-                url,
-                data=data,
-                headers={"Content-Type": "application/json"},
-                method="POST"
-            )
-            with urlopen(req, context=ctx, timeout=30) as response:
-                return json.loads(response.read().decode("utf-8"))
-        except URLError as e:
+            status, body = PRODUCTION.post_json(url, {"code": code, "state": state})
+            if status >= 400 and not body.lstrip().startswith(b"{"):
+                return {"error": f"Production server returned HTTP {status}"}
+            # Error responses carry a JSON "detail", shown on the error page
+            result = json_loads(body)
+            if not isinstance(result, dict):
+                return {"error": f"Unexpected response from production server (HTTP {status})"}
+            return result
+        except (OSError, http.client.HTTPException) as e:
             return {"error": f"Failed to connect to production server: {e}"}
         except json.JSONDecodeError:
             return {"error": "Invalid response from production server"}
@@ -318,16 +402,28 @@ class OAuthRelayHandler(BaseHTTPRequestHandler):
         self.send_response(200)
         self.send_header("Content-Type", "text/html; charset=utf-8")
         self.end_headers()
-        html = SUCCESS_HTML.format(email=email, message=message)
-        self.wfile.write(html.encode("utf-8"))
+        self.write_template(SUCCESS_CHUNKS, email, message)
     
     def send_error_page(self, error: str):
         """Send error HTML page."""
         self.send_response(400)
         self.send_header("Content-Type", "text/html; charset=utf-8")
         self.end_headers()
-        html = ERROR_HTML.format(error=error)
-        self.wfile.write(html.encode("utf-8"))
+        self.write_template(ERROR_CHUNKS, error)
+    
+    def write_template(self, chunks: list, *values: str):
+        """Write pre-split template chunks interleaved with the encoded values."""
+        for chunk, value in zip(chunks, values):
+            self.wfile.write(chunk)
+            self.wfile.write(str(value).encode("utf-8"))
+        self.wfile.write(chunks[-1])
+
+
+class RelayHTTPServer(ThreadingHTTPServer):
+    """Thread per request, so a slow forward doesn't block other callbacks or the status page."""
+    
+    daemon_threads = True        # Don't wait for in-flight forwards on Ctrl+C
+    allow_reuse_address = True   # Restart right away even with sockets in TIME_WAIT
 
 
 def main():
@@ -380,9 +476,10 @@ production server URL where you want to add Google accounts.
     
     # Set target URL for handler
     OAuthRelayHandler.target_url = args.target.rstrip("/")
+    OAuthRelayHandler.waiting_page = WAITING_HTML.format(target=OAuthRelayHandler.target_url).encode("utf-8")
     
     # Create server
-    server = HTTPServer(("127.0.0.1", args.port), OAuthRelayHandler)
+    server = RelayHTTPServer(("127.0.0.1", args.port), OAuthRelayHandler)
     
     print("\n" + "=" * 60)
     print("  🔗 Antigravity OAuth Relay")